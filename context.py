@@ -1,10 +1,52 @@
 import json
 import argparse
+import atexit
+import functools
 import os
 import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Optional
 from neo4j import GraphDatabase
+from neo4j.exceptions import DriverError, Neo4jError
 from dotenv import load_dotenv
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Errors raised by read_items for malformed input
+JSON_ERRORS = (ValueError,) if ijson is None else (ValueError, ijson.JSONError)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import networkx as nx
+except ImportError:
+    nx = None
+
+BATCH_SIZE = 10000
+OUTPUT_BUFFER_SIZE = 1 << 20
+NODE_KEYS = ('id', 'label', 'group', 'file', 'code')
+
+# Depth bounds stay literal in the pattern so Neo4j can bound the expansion; only
+# a handful of distinct depths are used, so only a handful of plans get cached.
+# Nodes come back as positional [label, file, code] rows; code is only shipped
+# when it will be rendered.
+PARENT_PATTERN = "(target)<-[:DEPENDS_ON*0..{depth}]-(p)"
+CHILD_PATTERN = "(target)-[:DEPENDS_ON*1..{depth}]->(c)"
+TRAVERSAL_QUERY = """
+OPTIONAL MATCH (target:Node {{label: $name}})
+OPTIONAL MATCH path = {pattern}
+UNWIND nodes(path) AS x
+RETURN collect(DISTINCT [x.label, x.file, CASE WHEN $include_code THEN x.code END]) AS nodes
+"""
+
 
 class ArgsParser:
     def __init__(self):
@@ -15,6 +57,7 @@ class ArgsParser:
         upload_parser.add_argument("-f", "--full-context-file", default="output/context.json", help="Path to context.json file")
         upload_parser.add_argument("-r", "--run-analyzer", action="store_true", help="Run JS analyzer to generate context.json")
         upload_parser.add_argument("-p", "--path", help="Path to source project for --run-analyzer")
+        upload_parser.add_argument("-s", "--stream", action="store_true", help="Pipe analyzer output straight into the upload without writing context.json")
 
         context_parser = subparsers.add_parser("get-context", help="Get dependency context for a function")
         context_parser.add_argument("-n", "--function-name", required=True, help="Function/component name")
@@ -23,187 +66,378 @@ class ArgsParser:
         context_parser.add_argument("-o", "--output-file", default="output/context.txt", help="Write output to this file")
         context_parser.add_argument("-c", "--include-function-code", action="store_true", help="Include function code if available")
         context_parser.add_argument("-C", "--no-files-content", action="store_true", help="Exclude file contents from output")
+        context_parser.add_argument("-b", "--backend", choices=["neo4j", "memory"], default="neo4j", help="Query Neo4j or an in-memory graph built from context.json")
+
+        serve_parser = subparsers.add_parser("serve", help="Answer get-context requests read as JSON lines from stdin")
+        serve_parser.add_argument("-f", "--full-context-file", default="output/context.json", help="Default path to context.json")
+        serve_parser.add_argument("-o", "--output-file", default="output/context.txt", help="Default output file")
+        serve_parser.add_argument("-b", "--backend", choices=["neo4j", "memory"], default="neo4j", help="Query Neo4j or an in-memory graph built from context.json")
 
     def parse(self):
         return self.parser.parse_args()
 
 
-def load_dependencies(json_file):
-    with open(json_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+def read_items(f, key):
+    """Yield the entries of a top-level array from a binary JSON stream one at a time."""
+    if ijson is not None:
+        yield from ijson.items(f, f"{key}.item")
+    elif orjson is not None:
+        yield from orjson.loads(f.read()).get(key, [])
+    else:
+        yield from json.load(f).get(key, [])
+
+
+def iter_items(json_file, key):
+    with open(json_file, 'rb') as f:
+        yield from read_items(f, key)
 
 
-def push_to_neo4j(context, uri, user, password):
-    nodes = context.get("nodes", [])
+@functools.lru_cache(maxsize=1)
+def get_driver(uri, user, password):
     driver = GraphDatabase.driver(uri, auth=(user, password))
-    with driver.session() as session:
+    atexit.register(driver.close)
+    return driver
+
+
+def open_session(driver, database):
+    # Without NEO4J_DATABASE the session targets the server's home database
+    if database:
+        return driver.session(database=database)
+    return driver.session()
+
+
+def push_to_neo4j(nodes, driver, database):
+    # Pull the first record before touching the graph, so a missing or unreadable
+    # input fails without wiping the existing data
+    nodes = iter(nodes)
+    nodes = chain(list(islice(nodes, 1)), nodes)
+    with open_session(driver, database) as session:
+        create_indexes(session)
         session.execute_write(clear_graph)
 
+        # Function nodes are flushed while streaming; dependencies are resolved by
+        # name once every function has been seen, then linked after all nodes exist.
         function_index = {}
-        for item in nodes:
-            file = item['file']
-            func = item['function']
-            full_func = f"{file}::{func}"
-            function_index[func] = {
-                'id': full_func,
-                'label': func,
-                'group': os.path.dirname(file),
-                'file': file,
-                'code': item.get('code', '')
-            }
-
-        for item in nodes:
-            func_entry = function_index[item['function']]
-            session.execute_write(create_node, **func_entry)
-
-            for dep in item.get("dependencies", []):
-                dep_entry = function_index.get(dep)
-                if dep_entry:
-                    session.execute_write(create_node, **dep_entry)
-                    session.execute_write(create_edge, func_entry['id'], dep_entry['id'])
-                else:
-                    unresolved_id = f"unknown::{dep}"
-                    session.execute_write(create_node, unresolved_id, dep, 'unknown', '', '')
-                    session.execute_write(create_edge, func_entry['id'], unresolved_id)
-
-            for ext in item.get("dependenciesExternal", []):
-                session.execute_write(create_node, ext, ext, 'external', '', '')
-                session.execute_write(create_edge, func_entry['id'], ext)
-    driver.close()
+        pending_deps = []
+        nodes_payload = []
+        edges_payload = []
+        emitted_ids = set()
+        # Most files define several functions, so each directory is computed once
+        get_group = functools.lru_cache(maxsize=None)(os.path.dirname)
+        # Paths and names repeat across records; interning makes the index and
+        # cache lookups identity comparisons and stores each string once
+        intern = sys.intern
+
+        def add_node(entry):
+            if entry['id'] not in emitted_ids:
+                emitted_ids.add(entry['id'])
+                nodes_payload.append(entry)
+            if len(nodes_payload) >= BATCH_SIZE:
+                session.execute_write(create_nodes, nodes_payload)
+                nodes_payload.clear()
+
+        for chunk in chunked(nodes, BATCH_SIZE):
+            files = [intern(i['file']) for i in chunk]
+            funcs = [intern(i['function']) for i in chunk]
+            codes = [i.get('code', '') for i in chunk]
+            ids = [f"{file}::{func}" for file, func in zip(files, funcs)]
+            groups = [get_group(file) for file in files]
+            function_index.update(zip(funcs, ids))
+
+            for row in zip(ids, funcs, groups, files, codes):
+                add_node(dict(zip(NODE_KEYS, row)))
+
+            for full_func, item in zip(ids, chunk):
+                for dep in item.get("dependencies", []):
+                    pending_deps.append((full_func, intern(dep)))
+
+                for ext in item.get("dependenciesExternal", []):
+                    add_node({'id': ext, 'label': ext, 'group': 'external', 'file': '', 'code': ''})
+                    edges_payload.append({'src': full_func, 'dst': ext})
+
+        for src_id, dep in pending_deps:
+            dep_id = function_index.get(dep)
+            if dep_id is None:
+                dep_id = f"unknown::{dep}"
+                add_node({'id': dep_id, 'label': dep, 'group': 'unknown', 'file': '', 'code': ''})
+            edges_payload.append({'src': src_id, 'dst': dep_id})
+
+        if nodes_payload:
+            session.execute_write(create_nodes, nodes_payload)
+        for batch in chunked(edges_payload, BATCH_SIZE):
+            session.execute_write(create_edges, batch)
+
+
+def stream_analyzer_to_neo4j(path, driver, database):
+    proc = subprocess.Popen(["node", "./gengraph.js", "-p", path, "-o", "-"], stdout=subprocess.PIPE)
+    pushed = False
+    try:
+        with proc.stdout:
+            push_to_neo4j(read_items(proc.stdout, "nodes"), driver, database)
+        pushed = True
+    except JSON_ERRORS:
+        # Empty or truncated output usually means the analyzer itself failed
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args) from None
+        raise
+    finally:
+        if not pushed and proc.poll() is None:
+            proc.kill()
+        proc.wait()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def create_indexes(session):
+    session.run("CREATE INDEX node_id IF NOT EXISTS FOR (n:Node) ON (n.id)").consume()
+    session.run("CREATE INDEX node_label IF NOT EXISTS FOR (n:Node) ON (n.label)").consume()
 
 
 def clear_graph(tx):
-    tx.run("MATCH (n) DETACH DELETE n")
+    tx.run("MATCH (n) DETACH DELETE n").consume()
 
 
-def create_node(tx, id, label, group, file, code):
+def create_nodes(tx, rows):
     tx.run(
-        "MERGE (n:Node {id: $id}) SET n.label = $label, n.group = $group, n.file = $file, n.code = $code",
-        id=id, label=label, group=group, file=file, code=code
-    )
+        "UNWIND $rows AS r "
+        "MERGE (n:Node {id: r.id}) SET n.label = r.label, n.group = r.group, n.file = r.file, n.code = r.code",
+        rows=rows
+    ).consume()
 
 
-def create_edge(tx, src_id, dst_id):
+def create_edges(tx, rows):
     tx.run(
-        "MATCH (a:Node {id: $src}), (b:Node {id: $dst}) MERGE (a)-[:DEPENDS_ON]->(b)",
-        src=src_id, dst=dst_id
-    )
+        "UNWIND $rows AS r "
+        "MATCH (a:Node {id: r.src}), (b:Node {id: r.dst}) MERGE (a)-[:DEPENDS_ON]->(b)",
+        rows=rows
+    ).consume()
 
 
-def depth2neo4j(depth_range: str, direction: str) -> str:
+def depth2neo4j(depth_range: str, direction: str) -> Optional[int]:
+    """Return the maximum traversal depth for a direction, or None when unbounded."""
     try:
         up_raw, down_raw = (depth_range.split(":") + [""])[:2]
     except ValueError:
         raise ValueError("Invalid depth format. Use format like '*:*', '2:3', '*:0', etc.")
 
     if direction == "parent":
-        if up_raw.strip() == "*" or up_raw == "":
-            return "0.."
-        elif up_raw.isdigit():
-            return f"0..{up_raw}"
-        else:
-            raise ValueError("Invalid parent depth")
+        raw = up_raw
     elif direction == "child":
-        if down_raw.strip() == "*" or down_raw == "":
-            return "1.."
-        elif down_raw == "0":
-            return ""
-        elif down_raw.isdigit():
-            return f"1..{down_raw}"
-        else:
-            raise ValueError("Invalid child depth")
-    return ""
+        raw = down_raw
+    else:
+        return None
 
+    if raw.strip() == "*" or raw == "":
+        return None
+    elif raw.isdigit():
+        return int(raw)
+    else:
+        raise ValueError(f"Invalid {direction} depth")
 
-def get_context(function_name, uri, user, password, depth, context_file, output_file, include_code, skip_files_content):
-    context_data = load_dependencies(context_file)
-    files_map = {entry["path"]: entry["content"] for entry in context_data.get("filesContent", [])}
 
-    parent_range = depth2neo4j(depth, "parent")
-    child_range = depth2neo4j(depth, "child")
+def traversal_query(pattern, depth):
+    return TRAVERSAL_QUERY.format(pattern=pattern.format(depth="" if depth is None else depth))
+
+
+def fetch_nodes(driver, database, pattern, name, depth, include_code):
+    query = traversal_query(pattern, depth)
+    with open_session(driver, database) as session:
+        return session.run(query, name=name, include_code=include_code).single()["nodes"]
+
+
+def write_section(f, title, blocks):
+    f.write(f"\n{title}\n")
+    if not blocks:
+        f.write("None")
+        return
+    f.write(blocks[0])
+    for block in blocks[1:]:
+        f.write("\n")
+        f.write(block)
 
-    driver = GraphDatabase.driver(uri, auth=(user, password))
+
+def fetch_from_neo4j(driver, database, context_file, function_name, parent_depth, child_depth, include_code):
+    # context_file is only read by the in-memory backend.
+    # The traversals are independent, so each runs on its own session concurrently;
+    # a zero child depth skips the child traversal entirely
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        parent_future = pool.submit(
+            fetch_nodes, driver, database, PARENT_PATTERN, function_name, parent_depth, include_code
+        )
+        child_future = None
+        if child_depth != 0:
+            child_future = pool.submit(
+                fetch_nodes, driver, database, CHILD_PATTERN, function_name, child_depth, include_code
+            )
+        parent_nodes = parent_future.result()
+        child_nodes = child_future.result() if child_future else []
+    return parent_nodes, child_nodes
+
+
+@functools.lru_cache(maxsize=1)
+def build_memory_graph(context_file, mtime_ns):
+    """Build the same graph that upload pushes to Neo4j, as an in-process DiGraph.
+
+    mtime_ns only keys the cache, so a regenerated context.json is rebuilt.
+    """
+    graph = nx.DiGraph()
+    function_index = {}
+    pending_deps = []
+    for item in iter_items(context_file, "nodes"):
+        file = item['file']
+        func = item['function']
+        full_func = f"{file}::{func}"
+        function_index[func] = full_func
+        graph.add_node(full_func, label=func, file=file, code=item.get('code', ''))
+        pending_deps.extend((full_func, dep) for dep in item.get("dependencies", []))
+
+        for ext in item.get("dependenciesExternal", []):
+            graph.add_node(ext, label=ext, file='', code='')
+            graph.add_edge(full_func, ext)
+
+    for src_id, dep in pending_deps:
+        dep_id = function_index.get(dep)
+        if dep_id is None:
+            dep_id = f"unknown::{dep}"
+            graph.add_node(dep_id, label=dep, file='', code='')
+        graph.add_edge(src_id, dep_id)
+    return graph
+
+
+def collect_reachable(graph, sources, depth):
+    reached = {}
+    for source in sources:
+        reached.update(nx.single_source_shortest_path_length(graph, source, cutoff=depth))
+    attrs = graph.nodes
+    return [(attrs[n]['label'], attrs[n]['file'], attrs[n]['code']) for n in reached]
+
+
+def fetch_from_memory(context_file, function_name, parent_depth, child_depth, include_code):
+    # include_code only trims what Neo4j sends; in memory the code is already at hand
+    graph = build_memory_graph(context_file, os.stat(context_file).st_mtime_ns)
+    targets = [n for n, label in graph.nodes(data="label") if label == function_name]
+    parent_nodes = collect_reachable(graph.reverse(copy=False), targets, parent_depth)
+    child_nodes = collect_reachable(graph, targets, child_depth) if child_depth != 0 else []
+    return parent_nodes, child_nodes
+
+
+def get_context(function_name, fetch_context, depth, context_file, output_file, include_code, skip_files_content):
+    parent_depth = depth2neo4j(depth, "parent")
+    child_depth = depth2neo4j(depth, "child")
 
     parents = []
     children = []
     files_in_context = set()
     target_info = None
 
-    with driver.session() as session:
-
-        # Parent query
-        parent_query = f"""
-        MATCH (target:Node {{label: $name}})
-        OPTIONAL MATCH path = (target)<-[:DEPENDS_ON*{parent_range}]-(p)
-        WITH collect(nodes(path)) AS nodes, target
-        UNWIND nodes AS n
-        UNWIND n AS x
-        RETURN DISTINCT x.label AS label, x.file AS file, x.code AS code, target.label AS targetLabel
-        """
-        parent_result = session.run(parent_query, name=function_name)
-        for record in parent_result:
-            label = record["label"]
-            file = record["file"]
-            code = record.get("code", "")
-            files_in_context.add(file)
-            if label == function_name:
-                target_info = f"\n🎯 Component/Function of interest: {function_name}\n\tFile: {file}"
-                if include_code and code:
-                    target_info += f"\nCode:\n{code}"
-                continue
-            block = f"\n🔹 {label}\n\tFile: {file}"
-            if include_code and code:
-                block += f"\n\tCode:\n{code}"
-            parents.append(block)
-
-        # Child query
-        if child_range:
-            child_query = f"""
-            MATCH (target:Node {{label: $name}})
-            OPTIONAL MATCH path2 = (target)-[:DEPENDS_ON*{child_range}]->(c)
-            WITH collect(nodes(path2)) AS nodes, target
-            UNWIND nodes AS n
-            UNWIND n AS x
-            RETURN DISTINCT x.label AS label, x.file AS file, x.code AS code
-            """
-            child_result = session.run(child_query, name=function_name)
-            for record in child_result:
-                label = record["label"]
-                file = record["file"]
-                code = record.get("code", "")
-                files_in_context.add(file)
-                if label == function_name:
-                    continue
-                block = f"\n🔹 {label}\n\tFile: {file}"
-                if include_code and code:
-                    block += f"\n\tCode:\n{code}"
-                children.append(block)
-
-    out = []
-    if target_info:
-        out.append(target_info)
-    else:
-        out.append(f"\n🎯 Component/Function '{function_name}' not found in graph.")
-
-    out.append("\n⬆️  Parent (calling) components/functions:")
-    out.append("None" if not parents else "\n".join(parents))
-
-    out.append("\n⬇️  Children (called) components/functions:")
-    out.append("None" if not children else "\n".join(children))
+    parent_nodes, child_nodes = fetch_context(context_file, function_name, parent_depth, child_depth, include_code)
+
+    for label, file, code in parent_nodes:
+        files_in_context.add(file)
+        if label == function_name:
+            code_part = f"\nCode:\n{code}" if include_code and code else ""
+            target_info = f"\n🎯 Component/Function of interest: {function_name}\n\tFile: {file}{code_part}"
+            continue
+        code_part = f"\n\tCode:\n{code}" if include_code and code else ""
+        block = f"\n🔹 {label}\n\tFile: {file}{code_part}"
+        parents.append(block)
+
+    for label, file, code in child_nodes:
+        files_in_context.add(file)
+        if label == function_name:
+            continue
+        code_part = f"\n\tCode:\n{code}" if include_code and code else ""
+        block = f"\n🔹 {label}\n\tFile: {file}{code_part}"
+        children.append(block)
 
     if not skip_files_content:
-        out.append("\n📄 Included File Contents:")
-        for file in sorted(files_in_context):
-            content = files_map.get(file, None)
-            if content:
-                out.append(f"\n--- {file} ---\n{content}\n")
-
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("\n".join(out))
-
-    print(f"✅ Context saved to {output_file}")
-    driver.close()
+        files_map = {
+            entry["path"]: entry["content"]
+            for entry in iter_items(context_file, "filesContent")
+            if entry["path"] in files_in_context
+        }
+
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as f:
+        if target_info:
+            f.write(target_info)
+        else:
+            f.write(f"\n🎯 Component/Function '{function_name}' not found in graph.")
+
+        write_section(f, "\n⬆️  Parent (calling) components/functions:", parents)
+        write_section(f, "\n⬇️  Children (called) components/functions:", children)
+
+        if not skip_files_content:
+            f.write("\n\n📄 Included File Contents:")
+            for file in sorted(files_in_context):
+                content = files_map.get(file, None)
+                if content:
+                    f.write(f"\n\n--- {file} ---\n")
+                    f.write(content)
+                    f.write("\n")
+
+    return output_file
+
+
+def normalize_depth(depth):
+    return depth if ':' in depth else f"{depth}:{depth}"
+
+
+def parse_request(line, context_file, output_file):
+    """Validate one serve request line and return it as get_context keyword arguments."""
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError("Request must be a JSON object")
+    if "function_name" not in request:
+        raise ValueError("Missing request field 'function_name'")
+
+    depth = request.get("depth", "*:*")
+    if isinstance(depth, int) and not isinstance(depth, bool):
+        depth = str(depth)
+    fields = {
+        "function_name": request["function_name"],
+        "depth": depth,
+        "full_context_file": request.get("full_context_file", context_file),
+        "output_file": request.get("output_file", output_file),
+    }
+    for name, value in fields.items():
+        if not isinstance(value, str):
+            raise ValueError(f"Request field '{name}' must be a string")
+
+    return {
+        "function_name": fields["function_name"],
+        "depth": normalize_depth(fields["depth"]),
+        "context_file": fields["full_context_file"],
+        "output_file": fields["output_file"],
+        "include_code": bool(request.get("include_function_code", False)),
+        "skip_files_content": bool(request.get("no_files_content", False)),
+    }
+
+
+def serve(fetch_context, context_file, output_file):
+    """Answer one get-context request per stdin line, keeping the backend warm between them."""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = parse_request(line, context_file, output_file)
+            saved = get_context(fetch_context=fetch_context, **request)
+            response = {"output_file": saved}
+        except KeyError as e:
+            response = {"error": f"Malformed context.json: missing key {e}"}
+        except TypeError as e:
+            response = {"error": f"Malformed context.json: {e}"}
+        except (*JSON_ERRORS, OSError, Neo4jError, DriverError) as e:
+            response = {"error": str(e)}
+        print(json.dumps(response), flush=True)
 
 
 def main():
@@ -213,32 +447,52 @@ def main():
     uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     user = os.getenv("NEO4J_USER", "neo4j")
     password = os.getenv("NEO4J_PASSWORD", "test1234")
+    database = os.getenv("NEO4J_DATABASE")
+    driver = get_driver(uri, user, password)
 
     if args.command == "upload":
+        if args.stream and not args.run_analyzer:
+            print("❌ --stream requires --run-analyzer")
+            return
         if args.run_analyzer:
             if not args.path:
                 print("❌ --path is required when using --run-analyzer")
                 return
             full_context_file = args.full_context_file
             print("⚙️ Running JS analyzer...")
-            subprocess.run(["node", "./gengraph.js", "-p", args.path, "-o", full_context_file], check=True)
-        context = load_dependencies(args.full_context_file)
-        push_to_neo4j(context, uri, user, password)
+            if args.stream:
+                stream_analyzer_to_neo4j(args.path, driver, database)
+            else:
+                subprocess.run(["node", "./gengraph.js", "-p", args.path, "-o", full_context_file], check=True)
+        if not args.stream:
+            nodes = iter_items(args.full_context_file, "nodes")
+            push_to_neo4j(nodes, driver, database)
         print("✅ Graph imported to Neo4j with full function metadata.")
 
-    elif args.command == "get-context":
-        depth = args.depth if ':' in args.depth else f"{args.depth}:{args.depth}"
-        get_context(
+    elif args.command in ("get-context", "serve"):
+        if args.backend == "memory":
+            if nx is None:
+                print("❌ networkx is required for --backend memory")
+                return
+            fetch_context = fetch_from_memory
+        else:
+            fetch_context = functools.partial(fetch_from_neo4j, driver, database)
+
+        if args.command == "serve":
+            serve(fetch_context, args.full_context_file, args.output_file)
+            return
+
+        depth = normalize_depth(args.depth)
+        saved = get_context(
             args.function_name,
-            uri,
-            user,
-            password,
+            fetch_context,
             depth,
             args.full_context_file,
             args.output_file,
             args.include_function_code,
             args.no_files_content
         )
+        print(f"✅ Context saved to {saved}")
     else:
         print("❌ Unknown command. Use --help for guidance.")
 
@@ -13,7 +13,7 @@ program
   .description('Analyze JS/TS files and extract function/component dependencies.')
   .requiredOption('-p, --path <path>', 'JS/TS file or directory to analyze')
   .option('-e, --external-dependencies', 'Include external dependencies in the result')
-  .option('-o, --output-file <file>', 'Write output to the specified file', 'output/context.json')
+  .option('-o, --output-file <file>', 'Write output to the specified file, or - for stdout', 'output/context.json')
   .option('-c, --include-function-code', 'Include source code for each function in output')
   .option('--verbosity <level>', 'Verbosity level: quiet | info | debug', 'info')
   .option('-x, --exclude <dirs...>', 'Directories to exclude from scanning', (value, prev) => prev.concat(value), [])
@@ -26,6 +26,7 @@ const verbosity = options.verbosity;
 const includeExternal = options.externalDependencies;
 const includeCode = options.includeFunctionCode;
 const outputFile = options.outputFile;
+const toStdout = outputFile === '-';
 const excludeDirs = new Set(['node_modules', 'dist', 'public', ...(options.exclude || [])]);
 
 const VERBOSE = {
@@ -34,8 +35,11 @@ const VERBOSE = {
   debug: 2,
 }[verbosity] ?? 1;
 
+// Keep stdout clean for the JSON payload when writing to it
+const info = toStdout ? console.error : console.log;
+
 function log(...args) {
-  if (VERBOSE >= 2) console.log('[DEBUG]', ...args);
+  if (VERBOSE >= 2) info('[DEBUG]', ...args);
 }
 
 function isSupportedFile(filePath) {
@@ -350,10 +354,14 @@ const result = {
   filesContent: Array.from(fileContentMap.values())
 };
 
-const resolvedOutputPath = path.resolve(outputFile);
-fs.mkdirSync(path.dirname(resolvedOutputPath), { recursive: true });
-fs.writeFileSync(resolvedOutputPath, JSON.stringify(result, null, 2), 'utf-8');
+if (toStdout) {
+  process.stdout.write(JSON.stringify(result));
+} else {
+  const resolvedOutputPath = path.resolve(outputFile);
+  fs.mkdirSync(path.dirname(resolvedOutputPath), { recursive: true });
+  fs.writeFileSync(resolvedOutputPath, JSON.stringify(result, null, 2), 'utf-8');
 
-if (VERBOSE >= 1) {
-  console.log(`Output written to ${resolvedOutputPath}`);
+  if (VERBOSE >= 1) {
+    info(`Output written to ${resolvedOutputPath}`);
+  }
 }